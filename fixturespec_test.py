@@ -348,7 +348,7 @@ home_dates:
         """A loaded spec's Parameters should be usable directly with fmodel.solve()."""
         path = self._write(_MINIMAL_SPEC)
         spec = fixturespec.load_spec(path)
-        fixtures = list(fmodel.solve(spec.parameters))
+        fixtures = fmodel.solve(spec.parameters)
         self.assertEqual(len(fixtures), 2)  # Albany v Hackney and Hackney v Albany
 
 
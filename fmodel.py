@@ -14,22 +14,53 @@
 
 """Library to model and solve Middlesex League fixtures scheduling."""
 
+import bisect
 import collections
 import dataclasses
+import functools
 import itertools
-from collections.abc import Collection, Mapping, MutableMapping
+from collections.abc import Collection, Iterator, Mapping, MutableMapping
 from datetime import date
+from typing import Any
 
 from ortools.sat.python import cp_model
 
 
-@dataclasses.dataclass(frozen=True)
-class Team:
+class _CachedHash:
+    """Slot for a precomputed hash, kept out of subclasses' dataclass fields.
+
+    Being a plain slot rather than a field, it doesn't appear in dataclasses.fields(),
+    asdict() or repr(); the per-process salted value is not data.
+    """
+
+    __slots__ = ("_hash",)
+    _hash: int
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Team(_CachedHash):
     division: int
     club: str
     index: int
     name_override: str | None = None
 
+    # Teams key most of solve()'s lookups, so hash once rather than on every use.
+    # __hash__ must be defined here, not on _CachedHash, or dataclass replaces it.
+    def __post_init__(self) -> None:
+        object.__setattr__(
+            self,
+            "_hash",
+            hash((self.division, self.club, self.index, self.name_override)),
+        )
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # Rebuild via __init__ so the cached hash is recomputed: str hashes are
+        # salted per process, so a pickled one may be stale when loaded elsewhere.
+        return (Team, (self.division, self.club, self.index, self.name_override))
+
     @property
     def name(self) -> str:
         """A display name usable when no richer club/team metadata is available.
@@ -42,13 +73,22 @@ class Team:
         return self.name_override if self.name_override else f"{self.club} {self.index}"
 
 
-@dataclasses.dataclass(frozen=True)
-class Fixture:
+@dataclasses.dataclass(frozen=True, slots=True)
+class Fixture(_CachedHash):
     home_team: Team
     away_team: Team
 
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_hash", hash((self.home_team, self.away_team)))
 
-@dataclasses.dataclass(frozen=True)
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (Fixture, (self.home_team, self.away_team))
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
 class ScheduledFixture:
     fixture: Fixture
     date: date
@@ -74,42 +114,133 @@ class Parameters:
     unavailable_away_dates: Mapping[ClubT, list[date]]
     min_gap_days: int = 7
     max_concurrent_home_matches: int = 2
+    # CP-SAT SatParameters field overrides, applied on top of _SOLVER_PARAMS
+    solver_params: Mapping[str, Any] = dataclasses.field(default_factory=dict)
+    break_symmetries: bool = True
+
+    @functools.cached_property
+    def teams_by_division(self) -> Mapping[int, list[Team]]:
+        result: MutableMapping[int, list[Team]] = collections.defaultdict(list)
+        for team in self.teams:
+            result[team.division].append(team)
+        return dict(result)
+
+    @functools.cached_property
+    def unavailable_away_date_sets(self) -> Mapping[ClubT, frozenset[date]]:
+        return {
+            club: frozenset(dates)
+            for club, dates in self.unavailable_away_dates.items()
+        }
+
+
+# Defaults for CP-SAT's SatParameters. num_workers is left at its default of 0,
+# which already means "use all available cores".
+_SOLVER_PARAMS: Mapping[str, Any] = {
+    # Extra LP relaxation cuts help with the many at-most-one/cardinality constraints
+    "linearization_level": 2,
+}
 
 
 def date_windows(dates: Collection[date], window_days: int) -> list[frozenset[date]]:
     """Given a list of dates and a window size, return the maximal subsets of dates which fall within the window size."""
-    all_windows: list[frozenset[date]] = []
-    dates = sorted(dates)
-    for i, d in enumerate(dates):
-        w = {d}
-        for j in range(i + 1, len(dates)):
-            if (dates[j] - d).days <= window_days:
-                w.add(dates[j])
-            else:
-                break
-        all_windows.append(frozenset(w))
-
-    all_windows.sort(key=lambda w: len(w), reverse=True)
+    dates = sorted(set(dates))
+    ordinals = [d.toordinal() for d in dates]
     result: list[frozenset[date]] = []
-    for window in all_windows:
-        if not any(window.issubset(w) for w in result):
-            result.append(window)
+    # For each start index i, advance j to the last date within the window. Since j
+    # never moves backwards, the window starting at i is only maximal if it reaches
+    # further than the one starting at i - 1 (otherwise it's a subset of it).
+    j = 0
+    prev_j = -1
+    for i, start in enumerate(ordinals):
+        # Each window contains at least its own start date, even if window_days < 0
+        j = max(j, i)
+        while j + 1 < len(ordinals) and ordinals[j + 1] - start <= window_days:
+            j += 1
+        if j > prev_j:
+            result.append(frozenset(dates[i : j + 1]))
+            prev_j = j
+
+    return result
+
+
+@functools.cache
+def _cached_date_windows(
+    dates: frozenset[date], window_days: int
+) -> tuple[frozenset[date], ...]:
+    """date_windows, memoized: many teams share the same set of candidate dates."""
+    return tuple(date_windows(dates, window_days))
+
+
+def _interchangeable_pairs(teams: Collection[Team]) -> list[tuple[Team, Team]]:
+    """Disjoint pairs of teams which the constraints cannot tell apart.
+
+    Teams from the same club in the same division share all their dates and limits,
+    so swapping two of them in any valid schedule gives another valid schedule.
+    """
+    teams_by_club_division: MutableMapping[tuple[str, int], list[Team]] = (
+        collections.defaultdict(list)
+    )
+    for team in teams:
+        teams_by_club_division[(team.club, team.division)].append(team)
+
+    result: list[tuple[Team, Team]] = []
+    for club_teams in teams_by_club_division.values():
+        club_teams = sorted(club_teams, key=lambda t: t.index)
+        result.extend(zip(club_teams[::2], club_teams[1::2], strict=False))
+    return result
+
+
+def _greedy_schedule(
+    dates_by_fixture: Mapping[Fixture, Collection[date]], params: Parameters
+) -> dict[Fixture, date]:
+    """Greedily place each fixture on its earliest date which keeps the schedule valid.
+
+    Fixtures which cannot be placed are left out, so the result may be partial. It is
+    only used to give the solver a good starting point, via hints.
+    """
+    result: dict[Fixture, date] = {}
+    team_dates: MutableMapping[Team, list[date]] = collections.defaultdict(list)
+    club_home_counts: collections.Counter[tuple[str, date]] = collections.Counter()
+
+    def too_close(team: Team, match_date: date) -> bool:
+        dates = team_dates[team]
+        i = bisect.bisect_left(dates, match_date)
+        return any(
+            abs((dates[j] - match_date).days) <= params.min_gap_days
+            for j in (i - 1, i)
+            if 0 <= j < len(dates)
+        )
+
+    for fixture, candidate_dates in dates_by_fixture.items():
+        home_club = fixture.home_team.club
+        for match_date in sorted(candidate_dates):
+            if (
+                club_home_counts[(home_club, match_date)]
+                >= params.max_concurrent_home_matches
+                or too_close(fixture.home_team, match_date)
+                or too_close(fixture.away_team, match_date)
+            ):
+                continue
+            result[fixture] = match_date
+            club_home_counts[(home_club, match_date)] += 1
+            bisect.insort(team_dates[fixture.home_team], match_date)
+            bisect.insort(team_dates[fixture.away_team], match_date)
+            break
 
     return result
 
 
-def solve(params: Parameters) -> Collection[ScheduledFixture]:
+def _solve_assignments(
+    params: Parameters,
+) -> tuple[cp_model.CpSolver, list[tuple[Fixture, date, cp_model.IntVar]]]:
+    """Build and solve the model, returning the solver and every candidate assignment."""
     model = cp_model.CpModel()
-    teams_by_division = collections.defaultdict(list)
-    for team in params.teams:
-        teams_by_division[team.division].append(team)
 
     vars_by_fixture: MutableMapping[Fixture, list[cp_model.IntVar]] = (
         collections.defaultdict(list)
     )
-    vars_by_fixture_date: MutableMapping[
-        tuple[Fixture, date], list[cp_model.IntVar]
-    ] = collections.defaultdict(list)
+    dates_by_fixture: dict[Fixture, list[date]] = {}
+    assignments: list[tuple[Fixture, date, cp_model.IntVar]] = []
     vars_by_team_date: MutableMapping[
         Team, MutableMapping[date, list[cp_model.IntVar]]
     ] = collections.defaultdict(lambda: collections.defaultdict(list))
@@ -117,20 +248,22 @@ def solve(params: Parameters) -> Collection[ScheduledFixture]:
         collections.defaultdict(list)
     )
 
-    for division_teams in teams_by_division.values():
+    for division_teams in params.teams_by_division.values():
         for home_team, away_team in itertools.permutations(division_teams, 2):
-            for match_date in params.home_dates[home_team.club]:
-                if match_date in params.unavailable_away_dates.get(away_team.club, []):
-                    continue
+            fixture = Fixture(home_team=home_team, away_team=away_team)
+            unavailable = params.unavailable_away_date_sets.get(
+                away_team.club, frozenset()
+            )
+            candidate_dates = [
+                d for d in params.home_dates[home_team.club] if d not in unavailable
+            ]
+            dates_by_fixture[fixture] = candidate_dates
+            for match_date in candidate_dates:
                 var = model.new_bool_var(
                     f"{home_team.name}_vs_{away_team.name}_{match_date.isoformat()}"
                 )
-                vars_by_fixture[
-                    Fixture(home_team=home_team, away_team=away_team)
-                ].append(var)
-                vars_by_fixture_date[
-                    (Fixture(home_team=home_team, away_team=away_team), match_date)
-                ].append(var)
+                vars_by_fixture[fixture].append(var)
+                assignments.append((fixture, match_date, var))
                 vars_by_team_date[home_team][match_date].append(var)
                 vars_by_team_date[away_team][match_date].append(var)
                 vars_by_club_home_date[(home_team.club, match_date)].append(var)
@@ -141,9 +274,13 @@ def solve(params: Parameters) -> Collection[ScheduledFixture]:
 
     for team_vars_by_date in vars_by_team_date.values():
         # Each team can play at most one match in each window
-        for window in date_windows(team_vars_by_date.keys(), params.min_gap_days):
-            window_vars = [v for d in window for v in team_vars_by_date[d]]
-            model.add(cp_model.LinearExpr.Sum(window_vars) <= 1)
+        for window in _cached_date_windows(
+            frozenset(team_vars_by_date.keys()), params.min_gap_days
+        ):
+            window_vars = itertools.chain.from_iterable(
+                team_vars_by_date[d] for d in window
+            )
+            model.add(cp_model.LinearExpr.Sum(list(window_vars)) <= 1)
 
     for club_home_date_vars in vars_by_club_home_date.values():
         # Each club can host at most max_concurrent_home_matches matches per date
@@ -152,14 +289,49 @@ def solve(params: Parameters) -> Collection[ScheduledFixture]:
             <= params.max_concurrent_home_matches
         )
 
+    if params.break_symmetries:
+        # Of each pair of interchangeable teams, the lower-indexed one hosts first
+        for team1, team2 in _interchangeable_pairs(params.teams):
+            first = Fixture(home_team=team1, away_team=team2)
+            second = Fixture(home_team=team2, away_team=team1)
+            if not dates_by_fixture[first] or not dates_by_fixture[second]:
+                continue
+            model.add(
+                cp_model.LinearExpr.WeightedSum(
+                    vars_by_fixture[first],
+                    [d.toordinal() for d in dates_by_fixture[first]],
+                )
+                < cp_model.LinearExpr.WeightedSum(
+                    vars_by_fixture[second],
+                    [d.toordinal() for d in dates_by_fixture[second]],
+                )
+            )
+
+    # Hint a greedy schedule so the solver starts its search close to a solution
+    hinted_dates = _greedy_schedule(dates_by_fixture, params)
+    for fixture, match_date, var in assignments:
+        if fixture in hinted_dates:
+            model.add_hint(var, hinted_dates[fixture] == match_date)
+
     solver = cp_model.CpSolver()
+    for name, value in {**_SOLVER_PARAMS, **params.solver_params}.items():
+        setattr(solver.parameters, name, value)
     status = solver.Solve(model)
     if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
-        result = []
-        for (fixture, match_date), fixture_vars in vars_by_fixture_date.items():
-            for var in fixture_vars:
-                if solver.BooleanValue(var):
-                    result.append(ScheduledFixture(fixture=fixture, date=match_date))
-        return result
+        return solver, assignments
     else:
         raise ValueError("No solution found")
+
+
+def solve_iter(params: Parameters) -> Iterator[ScheduledFixture]:
+    """Solve eagerly, but produce the scheduled fixtures lazily as they're consumed."""
+    solver, assignments = _solve_assignments(params)
+    return (
+        ScheduledFixture(fixture=fixture, date=match_date)
+        for fixture, match_date, var in assignments
+        if solver.BooleanValue(var)
+    )
+
+
+def solve(params: Parameters) -> list[ScheduledFixture]:
+    return list(solve_iter(params))
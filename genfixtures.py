@@ -16,10 +16,12 @@
 
 from __future__ import annotations
 
+import bisect
 import calendar
 import collections
+import operator
 import random
-from collections.abc import Collection
+from collections.abc import Collection, Iterable
 from datetime import date, timedelta
 
 import fmodel
@@ -72,7 +74,7 @@ def gen_dates(
         from_date: Start date (inclusive)
         to_date: End date (inclusive)
         day_of_week: Day of week to generate (0=Monday, 1=Tuesday, ..., 6=Sunday)
-        except_nth_occurrence: Collection of nth occurrences to exclude per month (e.g., [1] excludes first occurrence, [1, 3] excludes first and third)
+        exclude_month_occurrences: Collection of nth occurrences to exclude per month (e.g., [1] excludes first occurrence, [1, 3] excludes first and third), counted per calendar month even if from_date falls mid-month
 
     Returns:
         List of dates that match the specified weekday and are not excluded nth occurrences
@@ -80,32 +82,22 @@ def gen_dates(
     if exclude_month_occurrences is None:
         exclude_month_occurrences = []
 
+    # Matching dates form an arithmetic progression from the first one on or after
+    # from_date, and the nth occurrence in a month always falls on days 7n-6 to 7n.
+    first_date = from_date + timedelta(days=(day_of_week - from_date.weekday()) % 7)
     result = []
-    current_date = from_date
-    current_month = (current_date.year, current_date.month)
-    month_occurrences = 0
-
-    while current_date.weekday() != day_of_week:
-        current_date += timedelta(days=1)
-
-    while current_date <= to_date:
-        if current_month != (current_date.year, current_date.month):
-            current_month = (current_date.year, current_date.month)
-            month_occurrences = 0
-        month_occurrences += 1
-
-        if month_occurrences not in exclude_month_occurrences:
+    for offset in range(0, (to_date - first_date).days + 1, 7):
+        current_date = first_date + timedelta(days=offset)
+        if (current_date.day - 1) // 7 + 1 not in exclude_month_occurrences:
             result.append(current_date)
 
-        current_date += timedelta(days=7)
-
     return result
 
 
 def remove_random(dates: Collection[date], fraction: float) -> list[date]:
-    result = list(dates)
-    random.shuffle(result)
-    return sorted(list(result[: int(len(result) * (1 - fraction))]))
+    dates = sorted(dates)
+    keep = random.sample(range(len(dates)), int(len(dates) * (1 - fraction)))
+    return [dates[i] for i in sorted(keep)]
 
 
 _HOME_DATES = {
@@ -157,20 +149,27 @@ _MAX_CONCURRENT_HOME_MATCHES = 2
 _MIN_MATCH_GAP_DAYS = 7
 
 
-def print_fixtures(fixtures: Collection[fmodel.ScheduledFixture]) -> None:
-    fixtures_by_club = collections.defaultdict(list)
-    fixtures_by_team = collections.defaultdict(list)
+def print_fixtures(fixtures: Iterable[fmodel.ScheduledFixture]) -> None:
+    fixtures_by_club: dict[str, list[fmodel.ScheduledFixture]] = (
+        collections.defaultdict(list)
+    )
+    fixtures_by_team: dict[fmodel.Team, list[fmodel.ScheduledFixture]] = (
+        collections.defaultdict(list)
+    )
+    # Keep each bucket in date order as it is built, rather than sorting when printing
+    by_date = operator.attrgetter("date")
     for sf in fixtures:
-        fixtures_by_club[sf.fixture.home_team.club].append(sf)
-        fixtures_by_club[sf.fixture.away_team.club].append(sf)
-        fixtures_by_team[sf.fixture.home_team].append(sf)
-        fixtures_by_team[sf.fixture.away_team].append(sf)
+        home_team, away_team = sf.fixture.home_team, sf.fixture.away_team
+        bisect.insort(fixtures_by_club[home_team.club], sf, key=by_date)
+        bisect.insort(fixtures_by_club[away_team.club], sf, key=by_date)
+        bisect.insort(fixtures_by_team[home_team], sf, key=by_date)
+        bisect.insort(fixtures_by_team[away_team], sf, key=by_date)
 
     print("Fixtures by club:")
     for club, club_fixtures in fixtures_by_club.items():
         print(club)
         last_date = None
-        for sf in sorted(club_fixtures, key=lambda sf: sf.date):
+        for sf in club_fixtures:
             club_teams = [
                 (t, v, o)
                 for (t, v, o) in [
@@ -194,7 +193,7 @@ def print_fixtures(fixtures: Collection[fmodel.ScheduledFixture]) -> None:
     for team in sorted(fixtures_by_team.keys(), key=lambda t: (t.club, t.index)):
         print(team.name)
         last_date = None
-        for sf in sorted(fixtures_by_team[team], key=lambda sf: sf.date):
+        for sf in fixtures_by_team[team]:
             if sf.fixture.home_team == team:
                 venue = "Home"
                 opp = sf.fixture.away_team.name
@@ -224,8 +223,7 @@ def build_params() -> fmodel.Parameters:
 
 def main() -> None:
     random.seed(0)
-    fixtures = fmodel.solve(build_params())
-    print_fixtures(fixtures)
+    print_fixtures(fmodel.solve_iter(build_params()))
 
 
 if __name__ == "__main__":
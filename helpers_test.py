@@ -103,6 +103,28 @@ class TestGenDates(unittest.TestCase):
 
         self.assertEqual(result, expected)
 
+    def test_exclude_occurrence_mid_month_start(self):
+        """Test that occurrences are counted per calendar month, not from from_date."""
+        start = date(2025, 8, 10)  # Sunday, after the first Thursday of August
+        end = date(2025, 9, 30)
+
+        result = genfixtures.gen_dates(
+            start, end, calendar.THURSDAY, exclude_month_occurrences=[1]
+        )
+
+        # Aug Thursdays: 7 (before start), 14, 21, 28
+        # Sep Thursdays: 4 (excluded), 11, 18, 25
+        expected = [
+            date(2025, 8, 14),
+            date(2025, 8, 21),
+            date(2025, 8, 28),
+            date(2025, 9, 11),
+            date(2025, 9, 18),
+            date(2025, 9, 25),
+        ]
+
+        self.assertEqual(result, expected)
+
     def test_single_day_range(self):
         """Test with start and end on same weekday."""
         start = date(2025, 1, 6)  # Monday
@@ -162,12 +184,12 @@ class TestRemoveRandom(unittest.TestCase):
         super().setUp()
 
         # Set up the patch
-        shuffle_patcher = patch("genfixtures.random.shuffle")
-        self.mock_shuffle = shuffle_patcher.start()
-        self.addCleanup(shuffle_patcher.stop)
+        sample_patcher = patch("genfixtures.random.sample")
+        self.mock_sample = sample_patcher.start()
+        self.addCleanup(sample_patcher.stop)
 
-        # Default to identity shuffle (no actual shuffling) for most tests
-        self.mock_shuffle.side_effect = lambda x: None
+        # Default to sampling the first k elements (no randomness) for most tests
+        self.mock_sample.side_effect = lambda population, k: list(population)[:k]
 
     def test_remove_half(self):
         """Test removing 50% of dates."""
@@ -182,7 +204,7 @@ class TestRemoveRandom(unittest.TestCase):
         result = genfixtures.remove_random(dates, 0.5)
 
         # Should keep 50% of 5 dates = 2.5 -> 2 dates (int conversion)
-        # With identity shuffle (no actual shuffling), keeps first 2 dates
+        # With non-random sampling, keeps first 2 dates
         expected = [date(2025, 1, 1), date(2025, 1, 8)]
         self.assertEqual(result, expected)
 
@@ -199,7 +221,7 @@ class TestRemoveRandom(unittest.TestCase):
         result = genfixtures.remove_random(dates, 0.0)
 
         # Should keep all dates (100% - 0% = 100%)
-        expected = dates  # Same order since no shuffling
+        expected = dates
         self.assertEqual(result, expected)
 
     def test_remove_all(self):
@@ -217,8 +239,8 @@ class TestRemoveRandom(unittest.TestCase):
         self.assertEqual(len(result), 0)
         self.assertEqual(result, [])
 
-    def test_shuffle_called(self):
-        """Test that shuffle is actually called."""
+    def test_sample_called(self):
+        """Test that sample is actually called."""
         dates = [
             date(2025, 1, 1),
             date(2025, 1, 8),
@@ -228,7 +250,7 @@ class TestRemoveRandom(unittest.TestCase):
         ]
 
         genfixtures.remove_random(dates, 0.2)
-        self.mock_shuffle.assert_called_once()
+        self.mock_sample.assert_called_once()
 
     def test_empty_input(self):
         """Test with empty date list."""
@@ -353,6 +375,15 @@ class TestDateWindows(unittest.TestCase):
 
         self.assertCountEqual(result, expected)
 
+    def test_negative_window_size(self):
+        """Test that a negative window size still gives one window per date."""
+        dates = [date(2025, 1, 1), date(2025, 1, 5), date(2025, 1, 9)]
+
+        result = fmodel.date_windows(dates, window_days=-1)
+
+        expected = [frozenset([d]) for d in dates]
+        self.assertCountEqual(result, expected)
+
     def test_unsorted_input(self):
         """Test that function handles unsorted input correctly."""
         dates = [date(2025, 1, 8), date(2025, 1, 1), date(2025, 1, 3)]
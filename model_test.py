@@ -15,9 +15,10 @@
 """Test cases for fixtures model constraints."""
 
 import collections
+import itertools
 import random
 import unittest
-from datetime import date
+from datetime import date, timedelta
 
 import fmodel
 import genfixtures
@@ -32,7 +33,38 @@ class TestSolve(unittest.TestCase):
         # Seed random number generator for reproducible test results
         random.seed(42)
         cls.params = genfixtures.build_params()
-        cls.fixtures = list(fmodel.solve(cls.params))
+        cls.fixtures = fmodel.solve(cls.params)
+        # Built from the teams here rather than reusing Parameters.teams_by_division,
+        # so the tests don't share the grouping solve() itself relies on
+        cls.teams_by_division = collections.defaultdict(list)
+        for team in cls.params.teams:
+            cls.teams_by_division[team.division].append(team)
+        cls.home_dates_set = {
+            club: frozenset(dates) for club, dates in cls.params.home_dates.items()
+        }
+        cls.unavailable_away_set = {
+            club: frozenset(dates)
+            for club, dates in cls.params.unavailable_away_dates.items()
+        }
+
+        # Group the fixtures in a single pass, for the tests below to share
+        cls.team_dates = collections.defaultdict(list)
+        cls.home_fixtures_by_club_date = collections.Counter()
+        cls.fixtures_by_division = collections.Counter()
+        cls.home_count_by_team = collections.Counter()
+        cls.away_count_by_team = collections.Counter()
+        cls.scheduled_pairs = set()
+        for sf in cls.fixtures:
+            home_team, away_team = sf.fixture.home_team, sf.fixture.away_team
+            cls.team_dates[home_team].append(sf.date)
+            cls.team_dates[away_team].append(sf.date)
+            cls.home_fixtures_by_club_date[(home_team.club, sf.date)] += 1
+            cls.fixtures_by_division[home_team.division] += 1
+            cls.home_count_by_team[home_team] += 1
+            cls.away_count_by_team[away_team] += 1
+            cls.scheduled_pairs.add((home_team, away_team))
+        for dates in cls.team_dates.values():
+            dates.sort()
 
     def test_basic_solve(self):
         """Test that solve produces fixtures with real parameters."""
@@ -42,31 +74,25 @@ class TestSolve(unittest.TestCase):
 
     def test_fixture_uniqueness(self):
         """Test that all fixtures are unique."""
-        fixture_pairs = set()
-        for sf in self.fixtures:
-            pair = (sf.fixture.home_team, sf.fixture.away_team)
-            self.assertNotIn(pair, fixture_pairs, f"Duplicate fixture: {pair}")
-            fixture_pairs.add(pair)
+        if len(self.scheduled_pairs) != len(self.fixtures):
+            [(pair, _)] = collections.Counter(
+                (sf.fixture.home_team, sf.fixture.away_team) for sf in self.fixtures
+            ).most_common(1)
+            self.fail(f"Duplicate fixture: {pair}")
 
     def test_valid_home_dates(self):
         """Test that all fixtures are on valid home dates."""
         for sf in self.fixtures:
             home_club = sf.fixture.home_team.club
-            self.assertIn(
-                sf.date,
-                self.params.home_dates[home_club],
-                f"Fixture on {sf.date} not on valid home date for {home_club}",
-            )
+            if sf.date not in self.home_dates_set[home_club]:
+                self.fail(
+                    f"Fixture on {sf.date} not on valid home date for {home_club}"
+                )
 
     def test_team_constraints(self):
         """Test that team constraints are satisfied with real parameters."""
         # Verify no team plays more than one fixture on the same date
-        team_schedule = collections.defaultdict(list)
-        for sf in self.fixtures:
-            team_schedule[sf.fixture.home_team].append(sf.date)
-            team_schedule[sf.fixture.away_team].append(sf.date)
-
-        for team, dates in team_schedule.items():
+        for team, dates in self.team_dates.items():
             unique_dates = set(dates)
             self.assertEqual(
                 len(dates),
@@ -77,46 +103,37 @@ class TestSolve(unittest.TestCase):
     def test_min_gap_constraint(self):
         """Test minimum gap days constraint with real parameters."""
         # Verify minimum gap constraint for each team
-        team_dates = collections.defaultdict(list)
-        for sf in self.fixtures:
-            team_dates[sf.fixture.home_team].append(sf.date)
-            team_dates[sf.fixture.away_team].append(sf.date)
-
-        for team, dates in team_dates.items():
-            sorted_dates = sorted(dates)
-            for i in range(1, len(sorted_dates)):
-                gap = (sorted_dates[i] - sorted_dates[i - 1]).days
-                self.assertGreaterEqual(
-                    gap,
-                    self.params.min_gap_days,
-                    f"Team {team.name} has fixtures too close: {sorted_dates[i - 1]} and {sorted_dates[i]} (gap: {gap} days)",
-                )
+        for team, dates in self.team_dates.items():
+            if len(dates) < 2:
+                continue
+            gap, earlier, later = min(
+                ((later - earlier).days, earlier, later)
+                for earlier, later in itertools.pairwise(dates)
+            )
+            self.assertGreaterEqual(
+                gap,
+                self.params.min_gap_days,
+                f"Team {team.name} has fixtures too close: {earlier} and {later} (gap: {gap} days)",
+            )
 
     def test_max_concurrent_home_constraint(self):
         """Test max concurrent home matches constraint with real parameters."""
-        # Count home fixtures per club per date
-        home_fixtures_by_club_date = collections.defaultdict(int)
-        for sf in self.fixtures:
-            key = (sf.fixture.home_team.club, sf.date)
-            home_fixtures_by_club_date[key] += 1
-
-        for (club, fixture_date), count in home_fixtures_by_club_date.items():
-            self.assertLessEqual(
-                count,
-                self.params.max_concurrent_home_matches,
-                f"Club {club} has {count} home matches on {fixture_date}, exceeding limit of {self.params.max_concurrent_home_matches}",
-            )
+        # Only the busiest club/date needs checking against the limit
+        [((club, fixture_date), count)] = self.home_fixtures_by_club_date.most_common(1)
+        self.assertLessEqual(
+            count,
+            self.params.max_concurrent_home_matches,
+            f"Club {club} has {count} home matches on {fixture_date}, exceeding limit of {self.params.max_concurrent_home_matches}",
+        )
 
     def test_unavailable_away_dates(self):
         """Test that unavailable away dates are respected with real parameters."""
         # Verify clubs don't play away on their unavailable dates
         for sf in self.fixtures:
             away_club = sf.fixture.away_team.club
-            if away_club in self.params.unavailable_away_dates:
-                self.assertNotIn(
-                    sf.date,
-                    self.params.unavailable_away_dates[away_club],
-                    f"Club {away_club} scheduled away on unavailable date {sf.date}",
+            if sf.date in self.unavailable_away_set.get(away_club, ()):
+                self.fail(
+                    f"Club {away_club} scheduled away on unavailable date {sf.date}"
                 )
 
     def test_division_separation(self):
@@ -125,81 +142,171 @@ class TestSolve(unittest.TestCase):
         for sf in self.fixtures:
             home_division = sf.fixture.home_team.division
             away_division = sf.fixture.away_team.division
-            self.assertEqual(
-                home_division,
-                away_division,
-                f"Cross-division fixture: {sf.fixture.home_team.name} (div {home_division}) vs "
-                f"{sf.fixture.away_team.name} (div {away_division})",
-            )
+            if home_division != away_division:
+                self.fail(
+                    f"Cross-division fixture: {sf.fixture.home_team.name} (div {home_division}) vs "
+                    f"{sf.fixture.away_team.name} (div {away_division})"
+                )
 
     def test_completeness(self):
         """Test that all required fixtures within divisions are scheduled with real parameters."""
         # Calculate expected fixtures by division
-        teams_by_division = collections.defaultdict(list)
-        for team in self.params.teams:
-            teams_by_division[team.division].append(team)
-
-        expected_fixtures = set()
-        for division_teams in teams_by_division.values():
-            for home_team in division_teams:
-                for away_team in division_teams:
-                    if home_team != away_team:
-                        expected_fixtures.add((home_team, away_team))
+        expected_fixtures = set(
+            itertools.chain.from_iterable(
+                itertools.permutations(division_teams, 2)
+                for division_teams in self.teams_by_division.values()
+            )
+        )
 
         # Check all expected fixtures are scheduled
-        scheduled_fixtures = set()
-        for sf in self.fixtures:
-            scheduled_fixtures.add((sf.fixture.home_team, sf.fixture.away_team))
-
         self.assertEqual(
-            len(scheduled_fixtures),
-            len(expected_fixtures),
-            f"Expected {len(expected_fixtures)} fixtures, got {len(scheduled_fixtures)}",
-        )
-        self.assertEqual(
-            scheduled_fixtures,
+            self.scheduled_pairs,
             expected_fixtures,
             "Not all required fixtures were scheduled",
         )
 
     def test_fixture_count_by_division(self):
         """Test that fixture counts are correct for each division with real parameters."""
-        # Count fixtures by division
-        fixtures_by_division = collections.defaultdict(int)
-        teams_by_division = collections.defaultdict(int)
-
-        for team in self.params.teams:
-            teams_by_division[team.division] += 1
-
-        for sf in self.fixtures:
-            fixtures_by_division[sf.fixture.home_team.division] += 1
-
         # Each division should have n * (n-1) fixtures where n is number of teams
-        for division, team_count in teams_by_division.items():
-            expected_fixture_count = team_count * (team_count - 1)
-            actual_fixture_count = fixtures_by_division[division]
-            self.assertEqual(
-                actual_fixture_count,
-                expected_fixture_count,
-                f"Division {division}: expected {expected_fixture_count} fixtures, got {actual_fixture_count}",
-            )
+        # Counter equality treats missing keys as zero, e.g. for one-team divisions
+        expected_counts = collections.Counter(
+            {
+                division: len(division_teams) * (len(division_teams) - 1)
+                for division, division_teams in self.teams_by_division.items()
+            }
+        )
+        self.assertEqual(
+            self.fixtures_by_division,
+            expected_counts,
+            "Unexpected fixture counts by division",
+        )
 
     def test_teams_play_both_home_and_away(self):
         """Test that each team plays both home and away fixtures with real parameters."""
-        home_fixtures_by_team = collections.defaultdict(int)
-        away_fixtures_by_team = collections.defaultdict(int)
+        # The counters only have entries for teams with at least one fixture
+        teams = set(self.params.teams)
+        self.assertEqual(
+            teams - self.home_count_by_team.keys(),
+            set(),
+            "Some teams have no home fixtures",
+        )
+        self.assertEqual(
+            teams - self.away_count_by_team.keys(),
+            set(),
+            "Some teams have no away fixtures",
+        )
 
-        for sf in self.fixtures:
-            home_fixtures_by_team[sf.fixture.home_team] += 1
-            away_fixtures_by_team[sf.fixture.away_team] += 1
+    def test_solver_params(self):
+        """Test that solver parameter overrides are applied to CP-SAT."""
+        team1 = fmodel.Team(division=1, club="Test Club A", index=1)
+        team2 = fmodel.Team(division=1, club="Test Club B", index=1)
+        home_dates = {
+            "Test Club A": [date(2025, 1, 1)],
+            "Test Club B": [date(2025, 1, 15)],
+        }
 
-        for team in self.params.teams:
-            self.assertGreater(
-                home_fixtures_by_team[team], 0, f"Team {team.name} has no home fixtures"
-            )
-            self.assertGreater(
-                away_fixtures_by_team[team], 0, f"Team {team.name} has no away fixtures"
-            )
+        params = fmodel.Parameters(
+            teams=[team1, team2],
+            home_dates=home_dates,
+            unavailable_away_dates={},
+            solver_params={"num_workers": 1, "linearization_level": 0},
+        )
+        self.assertEqual(len(fmodel.solve(params)), 2)
+
+        params = fmodel.Parameters(
+            teams=[team1, team2],
+            home_dates=home_dates,
+            unavailable_away_dates={},
+            solver_params={"no_such_parameter": 1},
+        )
+        with self.assertRaises(AttributeError):
+            fmodel.solve(params)
+
+    def test_break_symmetries(self):
+        """Test that interchangeable teams are ordered by their mutual home fixtures."""
+        team1 = fmodel.Team(division=1, club="Test Club", index=1)
+        team2 = fmodel.Team(division=1, club="Test Club", index=2)
+
+        first = fmodel.Fixture(home_team=team1, away_team=team2)
+        second = fmodel.Fixture(home_team=team2, away_team=team1)
+
+        # Without the constraint, which of the two is first depends on the team
+        # order, the available dates and the solver's random seed
+        for teams, seed, date_count in itertools.product(
+            [[team1, team2], [team2, team1]], range(5), [2, 3]
+        ):
+            with self.subTest(teams=teams, seed=seed, date_count=date_count):
+                params = fmodel.Parameters(
+                    teams=teams,
+                    home_dates={
+                        "Test Club": [
+                            date(2025, 1, 1) + timedelta(days=14 * i)
+                            for i in range(date_count)
+                        ]
+                    },
+                    unavailable_away_dates={},
+                    solver_params={"random_seed": seed, "num_workers": 1},
+                )
+                fixture_dates = {sf.fixture: sf.date for sf in fmodel.solve(params)}
+                self.assertLess(fixture_dates[first], fixture_dates[second])
+
+    def test_greedy_schedule(self):
+        """Test that the greedy hint schedule respects the constraints it places around."""
+        team_a1 = fmodel.Team(division=1, club="Test Club A", index=1)
+        team_a2 = fmodel.Team(division=1, club="Test Club A", index=2)
+        team_b1 = fmodel.Team(division=1, club="Test Club B", index=1)
+        team_b2 = fmodel.Team(division=1, club="Test Club B", index=2)
+        team_c1 = fmodel.Team(division=1, club="Test Club C", index=1)
+        team_c2 = fmodel.Team(division=1, club="Test Club C", index=2)
+        params = fmodel.Parameters(
+            teams=[team_a1, team_a2, team_b1, team_b2, team_c1, team_c2],
+            home_dates={},
+            unavailable_away_dates={},
+            min_gap_days=7,
+            max_concurrent_home_matches=1,
+        )
+        weekly = [date(2025, 1, 1) + timedelta(days=7 * i) for i in range(10)]
+
+        # Placed first, on weekly[0] and weekly[2]
+        dates_by_fixture = {
+            fmodel.Fixture(home_team=home, away_team=away): weekly
+            for home, away in itertools.permutations([team_a1, team_a2], 2)
+        }
+        # Only possible date is within min_gap_days of the home team's fixtures
+        home_clash = fmodel.Fixture(home_team=team_a1, away_team=team_b1)
+        dates_by_fixture[home_clash] = weekly[1:2]
+        # Only possible date is within min_gap_days of the away team's fixtures
+        away_clash = fmodel.Fixture(home_team=team_b1, away_team=team_a2)
+        dates_by_fixture[away_clash] = weekly[1:2]
+        # Without the concurrency limit these would both be placed on weekly[0]
+        dates_by_fixture[fmodel.Fixture(home_team=team_b1, away_team=team_c1)] = weekly
+        dates_by_fixture[fmodel.Fixture(home_team=team_b2, away_team=team_c2)] = weekly
+        # No candidate dates at all
+        dateless = fmodel.Fixture(home_team=team_c1, away_team=team_b2)
+        dates_by_fixture[dateless] = []
+
+        result = fmodel._greedy_schedule(dates_by_fixture, params)
+
+        self.assertEqual(
+            result.keys(), dates_by_fixture.keys() - {home_clash, away_clash, dateless}
+        )
+        team_dates = collections.defaultdict(list)
+        home_counts = collections.Counter()
+        for fixture, match_date in result.items():
+            self.assertIn(match_date, dates_by_fixture[fixture])
+            team_dates[fixture.home_team].append(match_date)
+            team_dates[fixture.away_team].append(match_date)
+            home_counts[(fixture.home_team.club, match_date)] += 1
+        for team, dates in team_dates.items():
+            for earlier, later in itertools.pairwise(sorted(dates)):
+                self.assertGreater(
+                    (later - earlier).days,
+                    params.min_gap_days,
+                    f"Team {team.name} hinted too close: {earlier} and {later}",
+                )
+        self.assertLessEqual(
+            max(home_counts.values()), params.max_concurrent_home_matches
+        )
 
     def test_simple_impossible_constraint(self):
         """Test that impossible constraints result in no fixtures being scheduled."""
@@ -226,7 +333,7 @@ class TestSolve(unittest.TestCase):
         )
 
         # This should be impossible to schedule any fixtures due to conflicting constraints
-        result = list(fmodel.solve(params))
+        result = fmodel.solve(params)
         # Since constraints make it impossible to schedule required fixtures,
         # the solver returns an empty list (no feasible schedule)
         self.assertEqual(
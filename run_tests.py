@@ -13,27 +13,52 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""Simple test runner that automatically discovers tests with the correct pattern."""
+"""Simple test runner that automatically discovers tests with the correct pattern.
 
+Test names (e.g. model_test or model_test.TestSolve.test_completeness) can be
+given as arguments to run just those, skipping discovery, and -k narrows the
+run to test methods whose names match a substring or wildcard pattern.
+"""
+
+import argparse
 import sys
 import unittest
 
 
 def main():
-    """Run all tests using discovery with our custom pattern."""
-    # Configure test discovery
-    loader = unittest.TestLoader()
+    """Run the named tests, or all tests using discovery with our custom pattern."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "names",
+        nargs="*",
+        help="Test modules, classes or methods to run (default: discover all)",
+    )
+    parser.add_argument(
+        "-k",
+        dest="patterns",
+        action="append",
+        help="Only run tests matching this substring or wildcard pattern (repeatable)",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+    parser.add_argument("--failfast", action="store_true")
+    parser.add_argument("--buffer", action="store_true")
+    args = parser.parse_args()
 
-    # Discover tests with our pattern
-    suite = loader.discover(start_dir=".", pattern="*test*.py", top_level_dir=".")
+    loader = unittest.TestLoader()
+    if args.patterns:
+        # Same matching as unittest's own -k: bare substrings match anywhere
+        loader.testNamePatterns = [p if "*" in p else f"*{p}*" for p in args.patterns]
 
-    # Run tests with appropriate verbosity
-    verbosity = 2 if "-v" in sys.argv or "--verbose" in sys.argv else 1
+    if args.names:
+        suite = loader.loadTestsFromNames(args.names)
+    else:
+        # Discover tests with our pattern
+        suite = loader.discover(start_dir=".", pattern="*test*.py", top_level_dir=".")
 
     runner = unittest.TextTestRunner(
-        verbosity=verbosity,
-        failfast="--failfast" in sys.argv,
-        buffer="--buffer" in sys.argv,
+        verbosity=2 if args.verbose else 1,
+        failfast=args.failfast,
+        buffer=args.buffer,
     )
 
     result = runner.run(suite)